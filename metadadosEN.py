@@ -1,12 +1,91 @@
 import os
 import subprocess
 import json
+import io
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import re
 from datetime import datetime
 import sys
+import argparse
+import logging
+import logging.handlers
+import time
 
 #The files must be placed inside the destination folder, which in this case is METADATA!
 # C:\Users\InFuture\Desktop\CyberInvestigations\METADADOS
 
+# Module logger: diagnostics are logged at DEBUG and hidden by default
+logger = logging.getLogger("metadados")
+
+# Progress line currently shown (cleared and redrawn around each log message)
+_progresso_ativo = None
+
+# Buffered handler installed by configurar_logging on the root logger
+_handler_buffer = None
+
+# Supported file extensions
+EXTENSOES_SUPORTADAS = [
+    '.pdf', '.docx', '.doc',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'
+]
+
+class _HandlerTerminal(logging.StreamHandler):
+    """
+    StreamHandler that clears the progress line before each message and redraws it afterwards
+    """
+    def emit(self, record):
+        progresso = _progresso_ativo
+        if progresso is not None:
+            progresso.limpar_linha()
+        super().emit(record)
+        if progresso is not None:
+            progresso.redesenhar()
+
+def configurar_logging(nivel=logging.WARNING, arquivo_log=None, capacidade_buffer=500):
+    """
+    Configures logging with an in-memory buffer.
+    Messages are accumulated and written in batches; errors force an immediate write.
+    The buffer sits on the root logger, so library warnings (exifread, Pillow...) go
+    through it too; those warnings are only shown at INFO or DEBUG level.
+    """
+    if arquivo_log:
+        destino = logging.FileHandler(arquivo_log, encoding='utf-8')
+    else:
+        destino = _HandlerTerminal(sys.stderr)
+    destino.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    buffer = logging.handlers.MemoryHandler(
+        capacidade_buffer, flushLevel=logging.ERROR, target=destino
+    )
+
+    # Remove handlers from previous configurations
+    global _handler_buffer
+    raiz = logging.getLogger()
+    if _handler_buffer is not None:
+        raiz.removeHandler(_handler_buffer)
+        _handler_buffer.close()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    # Third-party libraries inherit the root level: a per-file warning (e.g. a PNG without
+    # EXIF) must not show up in the hot path at the default level
+    raiz.setLevel(nivel if nivel < logging.WARNING else max(nivel, logging.ERROR))
+    raiz.addHandler(buffer)
+    _handler_buffer = buffer
+
+    logger.setLevel(nivel)
+    logger.propagate = True
+
+def descarregar_logs():
+    """
+    Immediately writes the messages accumulated in the logging buffer
+    """
+    if _handler_buffer is not None:
+        _handler_buffer.flush()
+
 # Library verification and import
 def testar_instalacao_bibliotecas():
     """
@@ -66,6 +145,7 @@ try:
     from PIL.ExifTags import TAGS
     import exifread
     import cv2
+    import numpy as np
     import piexif
 except ImportError as e:
     print(f"Import error: {e}")
@@ -92,67 +172,446 @@ def converter_coordenadas_gps(coordenadas, referencia):
 
         return coordenada_decimal
     except Exception as e:
-        print(f"Error converting GPS coordinates: {e}")
+        logger.warning(f"Error converting GPS coordinates: {e}")
         return None
 
-def verificar_imagem(caminho_arquivo):
+def ler_imagem_opencv(caminho_arquivo, dados=None):
+    """
+    Loads the image with OpenCV from the path or from bytes already read
+    """
+    if dados is None:
+        return cv2.imread(caminho_arquivo)
+    return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def abrir_binario(caminho_arquivo, dados=None):
+    """
+    Opens the file in binary mode, or bytes already read as an in-memory file
+    """
+    if dados is None:
+        return open(caminho_arquivo, 'rb')
+    return io.BytesIO(dados)
+
+# Repr of an in-memory file that libraries put into their error messages
+_REPR_BYTESIO = re.compile(r"'?<_io\.BytesIO object at 0x[0-9a-fA-F]+>'?")
+
+def descrever_erro(erro, caminho_arquivo):
     """
-    Image diagnostic function
+    Error text with the file path in place of the in-memory file, so that the
+    message is the same with or without read-ahead
     """
-    print("\n🔬 Image Diagnostic:")
-    print(f"File: {caminho_arquivo}")
+    # Inside quotes ('%s' format, e.g. python-docx) becomes the quoted path; otherwise the path's %r
+    def substituir(encontrado):
+        if encontrado.group().startswith("'"):
+            return f"'{caminho_arquivo}'"
+        return repr(caminho_arquivo)
+
+    return _REPR_BYTESIO.sub(substituir, str(erro))
+
+def verificar_imagem(caminho_arquivo, dados=None):
+    """
+    Image diagnostic function.
+    Only runs with logging at DEBUG level, since it opens the image twice.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    logger.debug(f"🔬 Image Diagnostic: {caminho_arquivo}")
 
     try:
         # Check with Pillow
-        with Image.open(caminho_arquivo) as img:
-            print(f"✅ Pillow: Image loaded successfully")
-            print(f"Format: {img.format}")
-            print(f"Mode: {img.mode}")
-            print(f"Size: {img.size}")
+        with Image.open(io.BytesIO(dados) if dados is not None else caminho_arquivo) as img:
+            logger.debug(f"✅ Pillow: format={img.format} mode={img.mode} size={img.size}")
     except Exception as e:
-        print(f"❌ Pillow error: {e}")
+        logger.debug(f"❌ Pillow error: {descrever_erro(e, caminho_arquivo)}")
 
     try:
         # Check with OpenCV
-        imagem = cv2.imread(caminho_arquivo)
+        imagem = ler_imagem_opencv(caminho_arquivo, dados)
         if imagem is not None:
-            print(f"✅ OpenCV: Image loaded successfully")
-            print(f"Dimensions: {imagem.shape}")
+            logger.debug(f"✅ OpenCV: dimensions={imagem.shape}")
         else:
-            print("❌ OpenCV: Failed to load image")
+            logger.debug("❌ OpenCV: Failed to load image")
     except Exception as e:
-        print(f"❌ OpenCV error: {e}")
+        logger.debug(f"❌ OpenCV error: {e}")
+
+def formatar_duracao(segundos):
+    """
+    Formats a duration in seconds as HH:MM:SS
+    """
+    if segundos is None:
+        return "--:--:--"
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+class ProgressoExtracao:
+    """
+    Extraction progress: a single line updated in the terminal
+    (files/s, MB/s, per-format counts, errors and ETA) and, optionally,
+    a machine-readable JSON Lines stream for orchestration.
+    """
+    def __init__(self, total_arquivos, total_bytes, mostrar=None, arquivo_jsonl=None, intervalo=0.5):
+        self.total_arquivos = total_arquivos
+        self.total_bytes = total_bytes
+        # By default the line is only shown on a terminal; captured logs use the JSONL stream
+        if mostrar is None:
+            mostrar = sys.stderr is not None and sys.stderr.isatty()
+        self.mostrar = mostrar
+        self.intervalo = intervalo
+        self.arquivos = 0
+        self.bytes = 0
+        self.erros = 0
+        self.por_formato = {}
+        self.inicio = time.monotonic()
+        self._ultima_emissao = 0.0
+        self._largura_linha = 0
+        self._linha = ''
+        self._jsonl = open(arquivo_jsonl, 'a', encoding='utf-8') if arquivo_jsonl else None
+
+        global _progresso_ativo
+        if self.mostrar:
+            _progresso_ativo = self
+
+    def registrar(self, formato, tamanho_bytes, erro=False):
+        """
+        Records a processed file and refreshes the display if the interval has passed
+        """
+        self.arquivos += 1
+        self.bytes += tamanho_bytes
+        self.por_formato[formato] = self.por_formato.get(formato, 0) + 1
+        if erro:
+            self.erros += 1
+
+        agora = time.monotonic()
+        if agora - self._ultima_emissao >= self.intervalo:
+            self._emitir(agora, "progresso")
+
+    def estado(self, agora=None):
+        """
+        Returns the current progress state as a dictionary
+        """
+        if agora is None:
+            agora = time.monotonic()
+        decorrido = max(agora - self.inicio, 1e-9)
+        bytes_por_segundo = self.bytes / decorrido
+        bytes_restantes = max(self.total_bytes - self.bytes, 0)
+
+        if bytes_restantes == 0:
+            eta = 0.0
+        elif bytes_por_segundo > 0:
+            eta = bytes_restantes / bytes_por_segundo
+        else:
+            eta = None
+
+        return {
+            "arquivos": self.arquivos,
+            "total_arquivos": self.total_arquivos,
+            "bytes": self.bytes,
+            "total_bytes": self.total_bytes,
+            "erros": self.erros,
+            "por_formato": dict(self.por_formato),
+            "arquivos_por_segundo": round(self.arquivos / decorrido, 2),
+            "mb_por_segundo": round(bytes_por_segundo / (1024 * 1024), 2),
+            "decorrido_segundos": round(decorrido, 2),
+            "eta_segundos": None if eta is None else round(eta, 2)
+        }
+
+    def _emitir(self, agora, evento):
+        self._ultima_emissao = agora
+        estado = self.estado(agora)
+
+        if self.mostrar:
+            formatos = " ".join(f"{fmt}:{qtd}" for fmt, qtd in sorted(estado["por_formato"].items()))
+            linha = (
+                f"⏳ {estado['arquivos']}/{estado['total_arquivos']} files"
+                f" | {estado['arquivos_por_segundo']:.1f} files/s"
+                f" | {estado['mb_por_segundo']:.1f} MB/s"
+                f" | {formatos or '-'}"
+                f" | errors: {estado['erros']}"
+                f" | ETA {formatar_duracao(estado['eta_segundos'])}"
+            )
+            # Pad with spaces to clear leftovers from a longer previous line
+            self._largura_linha = max(self._largura_linha, len(linha))
+            self._linha = linha
+            sys.stderr.write("\r" + linha.ljust(self._largura_linha))
+            sys.stderr.flush()
+
+        if self._jsonl:
+            estado["evento"] = evento
+            estado["timestamp"] = datetime.now().isoformat()
+            self._jsonl.write(json.dumps(estado, ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+
+    def limpar_linha(self):
+        """
+        Clears the progress line from the terminal
+        """
+        if self.mostrar and self._largura_linha:
+            # +2: the leading emoji may take two columns
+            sys.stderr.write("\r" + " " * (self._largura_linha + 2) + "\r")
+            sys.stderr.flush()
+
+    def redesenhar(self):
+        """
+        Redraws the last progress line shown
+        """
+        if self.mostrar and self._linha:
+            sys.stderr.write("\r" + self._linha.ljust(self._largura_linha))
+            sys.stderr.flush()
+
+    def finalizar(self):
+        """
+        Emits the final state and ends the progress line
+        """
+        self._emitir(time.monotonic(), "fim")
+        if self.mostrar:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+        global _progresso_ativo
+        if _progresso_ativo is self:
+            _progresso_ativo = None
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
+
+def calcular_hash_arquivo(caminho_arquivo, tamanho_bloco=1024 * 1024):
+    """
+    Computes the SHA-256 hash of a file's content, reading in blocks
+    """
+    sha256 = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+# Separators between entries of a JSON report's file list
+_SEPARADORES_JSON = re.compile(r'[\s,:]*')
+
+def ler_relatorio_em_fluxo(caminho_relatorio, tamanho_bloco=1024 * 1024):
+    """
+    Reads the entries of the arquivos_processados list of a JSON report one at a time,
+    without loading the whole report into memory
+    """
+    decodificador = json.JSONDecoder()
+    marcador = '"arquivos_processados"'
+
+    with open(caminho_relatorio, 'r', encoding='utf-8') as f:
+        # Find the start of the file list
+        buffer = ''
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                raise ValueError(f"Report has no file list: {caminho_relatorio}")
+            buffer = buffer[-len(marcador):] + bloco
+            inicio = buffer.find(marcador)
+            if inicio >= 0:
+                buffer = buffer[inicio + len(marcador):]
+                break
+
+        pos = 0
+        lista_aberta = False
+        while True:
+            pos = _SEPARADORES_JSON.match(buffer, pos).end()
+            if pos >= len(buffer):
+                bloco = f.read(tamanho_bloco)
+                if not bloco:
+                    raise ValueError(f"Truncated report: {caminho_relatorio}")
+                buffer, pos = bloco, 0
+                continue
+
+            if not lista_aberta:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Invalid file list: {caminho_relatorio}")
+                lista_aberta = True
+                pos += 1
+                continue
+
+            if buffer[pos] == ']':
+                return
+
+            try:
+                entrada, fim = decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Incomplete entry in the buffer: read another block
+                bloco = f.read(tamanho_bloco)
+                if not bloco:
+                    raise ValueError(f"Truncated or invalid report: {caminho_relatorio}")
+                buffer, pos = buffer[pos:] + bloco, 0
+                continue
+
+            yield entrada
+            pos = fim
+
+def _entradas_ordenadas(caminho_relatorio):
+    """
+    Yields (key, entry) pairs from a report, requiring ascending key order
+    """
+    anterior = None
+    for entrada in ler_relatorio_em_fluxo(caminho_relatorio):
+        chave = entrada.get("caminho_relativo") or entrada.get("caminho_arquivo")
+        if anterior is not None and chave <= anterior:
+            raise ValueError(
+                f"Report is not sorted by path (generate it again with this version): {caminho_relatorio}"
+            )
+        anterior = chave
+        yield chave, entrada
+
+def validar_relatorio(caminho_relatorio):
+    """
+    Walks a report to check that it can be compared (exists, is valid and is
+    sorted by path). Returns the number of entries.
+    """
+    total = 0
+    for _ in _entradas_ordenadas(caminho_relatorio):
+        total += 1
+    return total
+
+# Fields that identify the file and are not compared
+CAMPOS_IDENTIFICACAO = {"nome_arquivo", "caminho_arquivo", "caminho_relativo"}
+
+# Filesystem fields that are not metadata embedded in the content
+CAMPOS_SISTEMA_ARQUIVOS = {"hash_sha256", "data_criacao", "data_modificacao"}
+
+# Metadata embedded in the file (EXIF, PDF and DOCX properties, GPS)
+PREFIXOS_METADADOS_EMBUTIDOS = ("exif_tags.", "metadados.", "coordenadas_gps.")
+CAMPOS_METADADOS_EMBUTIDOS = {"autor", "criado_em", "modificado_em", "categoria", "palavras_chave"}
+
+def _metadado_embutido(campo):
+    return campo in CAMPOS_METADADOS_EMBUTIDOS or campo.startswith(PREFIXOS_METADADOS_EMBUTIDOS)
+
+def _achatar(dados, prefixo=''):
+    """
+    Flattens nested dictionaries into parent.child keys
+    """
+    planos = {}
+    for chave, valor in dados.items():
+        if not prefixo and chave in CAMPOS_IDENTIFICACAO:
+            continue
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            planos.update(_achatar(valor, nome + "."))
+        else:
+            planos[nome] = valor
+    return planos
+
+def comparar_entradas(anterior, atual):
+    """
+    Compares two entries for the same file.
+    Returns the difference found, or None if nothing changed.
+    """
+    planos_anterior = _achatar(anterior)
+    planos_atual = _achatar(atual)
+    campos_alterados = {
+        campo: {"anterior": planos_anterior.get(campo), "atual": planos_atual.get(campo)}
+        for campo in sorted(set(planos_anterior) | set(planos_atual))
+        if planos_anterior.get(campo) != planos_atual.get(campo)
+    }
+    if not campos_alterados:
+        return None
+
+    # Content: hash when both sides have it; otherwise size and modification date
+    hash_anterior = anterior.get("hash_sha256")
+    hash_atual = atual.get("hash_sha256")
+    if hash_anterior and hash_atual:
+        conteudo_alterado = hash_anterior != hash_atual
+    else:
+        conteudo_alterado = (
+            anterior.get("tamanho_bytes") != atual.get("tamanho_bytes")
+            or anterior.get("data_modificacao") != atual.get("data_modificacao")
+        )
+
+    if not conteudo_alterado:
+        # Same content: filesystem dates (touch, chmod, copy to another drive)
+        # do not count as a change
+        campos_alterados = {
+            campo: valores for campo, valores in campos_alterados.items()
+            if campo not in CAMPOS_SISTEMA_ARQUIVOS
+        } or {
+            campo: valores for campo, valores in campos_alterados.items()
+            if campo == "data_modificacao" and hash_anterior and hash_atual
+        }
+        if not campos_alterados:
+            return None
+
+    # Classify by the changed fields: editing EXIF or a PDF Producer also changes
+    # the bytes, so the hash alone cannot tell a metadata edit apart
+    if any(_metadado_embutido(campo) for campo in campos_alterados):
+        status = "metadados_alterados"
+    elif conteudo_alterado:
+        status = "modificado"
+    elif "data_modificacao" in campos_alterados:
+        status = "data_modificacao_alterada"
+    else:
+        # Same bytes, but the extraction result changed (e.g. another library version)
+        status = "extracao_alterada"
+
+    return {
+        "status": status,
+        "caminho_relativo": atual.get("caminho_relativo") or atual.get("caminho_arquivo"),
+        "conteudo_alterado": conteudo_alterado,
+        "campos_alterados": campos_alterados
+    }
+
+def comparar_relatorios(relatorio_anterior, relatorio_atual):
+    """
+    Compares two reports by walking both in path order (bounded memory).
+    Yields only the differences: adicionado, removido, modificado, metadados_alterados
+    (embedded metadata changed), data_modificacao_alterada (same content, only the
+    modification date changed) or extracao_alterada (same content, different extraction).
+    """
+    anteriores = _entradas_ordenadas(relatorio_anterior)
+    atuais = _entradas_ordenadas(relatorio_atual)
+    anterior = next(anteriores, None)
+    atual = next(atuais, None)
+
+    while anterior is not None or atual is not None:
+        if atual is None or (anterior is not None and anterior[0] < atual[0]):
+            yield {"status": "removido", "caminho_relativo": anterior[0], "anterior": anterior[1]}
+            anterior = next(anteriores, None)
+        elif anterior is None or atual[0] < anterior[0]:
+            yield {"status": "adicionado", "caminho_relativo": atual[0], "atual": atual[1]}
+            atual = next(atuais, None)
+        else:
+            diferenca = comparar_entradas(anterior[1], atual[1])
+            if diferenca:
+                yield diferenca
+            anterior = next(anteriores, None)
+            atual = next(atuais, None)
 
 class MetadataExtractor:
-    def __init__(self, diretorio_base):
+    def __init__(self, diretorio_base, mostrar_progresso=None, arquivo_progresso=None, calcular_hash=True):
         self.diretorio_base = diretorio_base
+        self.mostrar_progresso = mostrar_progresso
+        self.arquivo_progresso = arquivo_progresso
+        self.calcular_hash = calcular_hash
+        self.ultimo_relatorio = None
         self.diretorio_resultados = os.path.join(diretorio_base, "RESULTADOS_METADADOS")
         os.makedirs(self.diretorio_resultados, exist_ok=True)
 
-    def extrair_metadados_imagem(self, caminho_arquivo):
+    def extrair_metadados_imagem(self, caminho_arquivo, dados=None):
         """
         Extracts detailed metadata from images
         """
         try:
             # Image diagnostic
-            verificar_imagem(caminho_arquivo)
+            verificar_imagem(caminho_arquivo, dados)
 
             # Extraction with Pillow
-            imagem_pil = Image.open(caminho_arquivo)
+            imagem_pil = Image.open(io.BytesIO(dados) if dados is not None else caminho_arquivo)
 
             # Extraction with ExifRead
-            with open(caminho_arquivo, 'rb') as img_file:
+            with abrir_binario(caminho_arquivo, dados) as img_file:
                 exif_tags = exifread.process_file(img_file, details=False)
 
             # Analysis with OpenCV - with error handling
             try:
-                imagem_cv2 = cv2.imread(caminho_arquivo)
+                imagem_cv2 = ler_imagem_opencv(caminho_arquivo, dados)
                 if imagem_cv2 is not None:
                     altura, largura, canais = imagem_cv2.shape
                 else:
                     altura, largura, canais = 0, 0, 0
             except Exception as e:
-                print(f"Error reading image with OpenCV: {e}")
+                logger.warning(f"Error reading image with OpenCV: {e}")
                 altura, largura, canais = 0, 0, 0
 
             # GPS coordinates processing
@@ -178,7 +637,7 @@ class MetadataExtractor:
                             "link_maps": f"https://www.google.com/maps?q={latitude},{longitude}"
                         }
             except Exception as e:
-                print(f"Error processing GPS: {e}")
+                logger.warning(f"Error processing GPS: {e}")
 
             # Metadata dictionary assembly
             info_imagem = {
@@ -200,14 +659,14 @@ class MetadataExtractor:
 
             return info_imagem
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
 
-    def extrair_metadados_pdf(self, caminho_arquivo):
+    def extrair_metadados_pdf(self, caminho_arquivo, dados=None):
         """
         Extracts metadata from PDF files
         """
         try:
-            with open(caminho_arquivo, 'rb') as arquivo:
+            with abrir_binario(caminho_arquivo, dados) as arquivo:
                 leitor_pdf = PyPDF2.PdfReader(arquivo)
                 metadados = leitor_pdf.metadata or {}
 
@@ -220,14 +679,14 @@ class MetadataExtractor:
                 }
                 return info_pdf
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
 
-    def extrair_metadados_docx(self, caminho_arquivo):
+    def extrair_metadados_docx(self, caminho_arquivo, dados=None):
         """
         Extracts metadata from DOCX files
         """
         try:
-            documento = docx.Document(caminho_arquivo)
+            documento = docx.Document(io.BytesIO(dados) if dados is not None else caminho_arquivo)
             propriedades = documento.core_properties
 
             info_docx = {
@@ -240,7 +699,78 @@ class MetadataExtractor:
             }
             return info_docx
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
+
+    def extrair_metadados_arquivo(self, caminho_completo, caminho_relativo=None, dados=None):
+        """
+        Extracts the basic information and type-specific metadata of a file.
+        If dados is given, uses those bytes already read instead of reading the file again.
+        """
+        arquivo = os.path.basename(caminho_completo)
+        extensao = os.path.splitext(arquivo)[1].lower()
+        if caminho_relativo is None:
+            caminho_relativo = os.path.relpath(caminho_completo, self.diretorio_base).replace(os.sep, '/')
+        estatisticas = os.stat(caminho_completo)
+
+        # Content hash; a read failure is recorded on the entry instead of dropping it
+        hash_sha256 = None
+        erro_hash = None
+        if dados is not None:
+            hash_sha256 = hashlib.sha256(dados).hexdigest()
+        elif self.calcular_hash:
+            try:
+                hash_sha256 = calcular_hash_arquivo(caminho_completo)
+            except OSError as e:
+                erro_hash = f"Error computing hash: {e}"
+
+        # Basic file info
+        info_arquivo = {
+            "nome_arquivo": arquivo,
+            "caminho_arquivo": caminho_completo,
+            "caminho_relativo": caminho_relativo,
+            "tamanho_bytes": estatisticas.st_size,
+            "hash_sha256": hash_sha256,
+            "data_criacao": datetime.fromtimestamp(estatisticas.st_ctime).isoformat(),
+            "data_modificacao": datetime.fromtimestamp(estatisticas.st_mtime).isoformat()
+        }
+
+        # Type-specific metadata extraction
+        if extensao == '.pdf':
+            metadados = self.extrair_metadados_pdf(caminho_completo, dados)
+        elif extensao in ['.docx', '.doc']:
+            metadados = self.extrair_metadados_docx(caminho_completo, dados)
+        elif extensao in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
+            metadados = self.extrair_metadados_imagem(caminho_completo, dados)
+        else:
+            metadados = {"erro": f"Unsupported extension: {extensao}"}
+
+        # Combine information
+        info_arquivo.update(metadados)
+        if erro_hash and "erro" not in info_arquivo:
+            info_arquivo["erro"] = erro_hash
+        return info_arquivo
+
+    def listar_arquivos_suportados(self):
+        """
+        Directory pre-scan: lists supported files with their sizes,
+        sorted by relative path (the order used by differential reports)
+        """
+        arquivos_alvo = []
+        for pasta_raiz, _, arquivos in os.walk(self.diretorio_base):
+            for arquivo in arquivos:
+                extensao = os.path.splitext(arquivo)[1].lower()
+                if extensao not in EXTENSOES_SUPORTADAS:
+                    continue
+                caminho_completo = os.path.join(pasta_raiz, arquivo)
+                try:
+                    tamanho = os.path.getsize(caminho_completo)
+                except OSError as e:
+                    logger.error(f"Error accessing {caminho_completo}: {e}")
+                    continue
+                caminho_relativo = os.path.relpath(caminho_completo, self.diretorio_base).replace(os.sep, '/')
+                arquivos_alvo.append((caminho_completo, caminho_relativo, arquivo, extensao, tamanho))
+        arquivos_alvo.sort(key=lambda item: item[1])
+        return arquivos_alvo
 
     def processar_diretorio(self):
         """
@@ -251,45 +781,34 @@ class MetadataExtractor:
             "arquivos_processados": []
         }
 
-        # Supported file extensions
-        extensoes_suportadas = [
-            '.pdf', '.docx', '.doc',
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'
-        ]
+        # Pre-scan to know the total bytes (basis for the ETA)
+        arquivos_alvo = self.listar_arquivos_suportados()
+        progresso = ProgressoExtracao(
+            len(arquivos_alvo),
+            sum(item[-1] for item in arquivos_alvo),
+            mostrar=self.mostrar_progresso,
+            arquivo_jsonl=self.arquivo_progresso
+        )
 
-        # Recursive directory scan
-        for pasta_raiz, _, arquivos in os.walk(self.diretorio_base):
-            for arquivo in arquivos:
-                caminho_completo = os.path.join(pasta_raiz, arquivo)
-                extensao = os.path.splitext(arquivo)[1].lower()
+        try:
+            for caminho_completo, caminho_relativo, arquivo, extensao, tamanho in arquivos_alvo:
+                erro = False
+                try:
+                    info_arquivo = self.extrair_metadados_arquivo(caminho_completo, caminho_relativo)
 
-                # Process only supported files
-                if extensao in extensoes_suportadas:
-                    try:
-                        # Basic file info
-                        info_arquivo = {
-                            "nome_arquivo": arquivo,
-                            "caminho_arquivo": caminho_completo,
-                            "tamanho_bytes": os.path.getsize(caminho_completo),
-                            "data_criacao": datetime.fromtimestamp(os.path.getctime(caminho_completo)).isoformat(),
-                            "data_modificacao": datetime.fromtimestamp(os.path.getmtime(caminho_completo)).isoformat()
-                        }
+                    if "erro" in info_arquivo:
+                        erro = True
+                        logger.info(f"Extraction failed for {caminho_completo}: {info_arquivo['erro']}")
 
-                        # Type-specific metadata extraction
-                        if extensao == '.pdf':
-                            metadados = self.extrair_metadados_pdf(caminho_completo)
-                        elif extensao in ['.docx', '.doc']:
-                            metadados = self.extrair_metadados_docx(caminho_completo)
-                        elif extensao in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
-                            metadados = self.extrair_metadados_imagem(caminho_completo)
-                        else:
-                            continue
-
-                        # Combine information
-                        info_arquivo.update(metadados)
-                        resultados["arquivos_processados"].append(info_arquivo)
-                    except Exception as e:
-                        print(f"Error processing {arquivo}: {e}")
+                    resultados["arquivos_processados"].append(info_arquivo)
+                except Exception as e:
+                    erro = True
+                    logger.error(f"Error processing {arquivo}: {e}")
+                finally:
+                    progresso.registrar(extensao.lstrip('.').upper(), tamanho, erro)
+        finally:
+            progresso.finalizar()
+            descarregar_logs()
 
         # Save results to JSON
         arquivo_saida = os.path.join(
@@ -301,9 +820,206 @@ class MetadataExtractor:
             json.dump(resultados, f, indent=4, ensure_ascii=False)
 
         print(f"\n📄 Report saved to: {arquivo_saida}")
+        self.ultimo_relatorio = arquivo_saida
         return resultados
 
+    def gerar_relatorio_diferencial(self, relatorio_anterior, relatorio_atual=None):
+        """
+        Generates a report with only the differences between a previous report and the current one.
+        Without relatorio_atual, uses the last report generated by processar_diretorio.
+        """
+        if relatorio_atual is None:
+            relatorio_atual = self.ultimo_relatorio
+        if relatorio_atual is None:
+            raise ValueError("No current report: run processar_diretorio first")
+
+        resumo = {
+            "adicionado": 0, "removido": 0, "modificado": 0,
+            "metadados_alterados": 0, "data_modificacao_alterada": 0, "extracao_alterada": 0
+        }
+        arquivo_saida = os.path.join(
+            self.diretorio_resultados,
+            f"diferencas_metadados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+
+        # Streamed write: each difference is written as soon as it is found, to a temporary
+        # file that is only renamed once the comparison finishes without errors
+        arquivo_temporario = arquivo_saida + ".tmp"
+        try:
+            with open(arquivo_temporario, 'w', encoding='utf-8') as f:
+                f.write("{\n")
+                f.write(f'    "data_processamento": {json.dumps(datetime.now().isoformat())},\n')
+                f.write(f'    "relatorio_anterior": {json.dumps(relatorio_anterior, ensure_ascii=False)},\n')
+                f.write(f'    "relatorio_atual": {json.dumps(relatorio_atual, ensure_ascii=False)},\n')
+                f.write('    "diferencas": [')
+                for diferenca in comparar_relatorios(relatorio_anterior, relatorio_atual):
+                    if sum(resumo.values()):
+                        f.write(",")
+                    texto = json.dumps(diferenca, indent=4, ensure_ascii=False, default=str)
+                    f.write("\n        " + texto.replace("\n", "\n        "))
+                    resumo[diferenca["status"]] += 1
+                f.write("\n    ],\n")
+                f.write('    "resumo": ' + json.dumps(resumo, indent=4).replace("\n", "\n    ") + "\n}\n")
+        except BaseException:
+            if os.path.exists(arquivo_temporario):
+                os.remove(arquivo_temporario)
+            raise
+        os.replace(arquivo_temporario, arquivo_saida)
+
+        print(f"\n🔀 Differential report saved to: {arquivo_saida}")
+        return resumo
+
+class AsyncMetadataExtractor:
+    """
+    Asynchronous front end for MetadataExtractor.
+    Reads files ahead of time with bounded concurrency (useful on NFS/SMB), while
+    extraction runs in a thread or process executor. Results come out of an
+    async iterator; at most max_pendentes files are in flight at a time and at most
+    max_leituras have their bytes in memory (being read or waiting for extraction).
+    """
+    def __init__(self, extrator, max_leituras=8, max_pendentes=32, executor=None,
+                 limite_bytes_leitura=64 * 1024 * 1024):
+        self.extrator = extrator
+        self.max_leituras = max_leituras
+        self.max_pendentes = max_pendentes
+        # None uses the loop's default executor (threads); a ProcessPoolExecutor also works
+        self.executor = executor
+        # Files larger than this limit are not read ahead
+        self.limite_bytes_leitura = limite_bytes_leitura
+        self._executor_leitura = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        """
+        Shuts down the read-ahead threads
+        """
+        if self._executor_leitura is not None:
+            self._executor_leitura.shutdown(wait=False)
+            self._executor_leitura = None
+
+    def _ler_arquivo(self, caminho_arquivo):
+        """
+        Reads the whole file (blocking; runs on the read threads)
+        """
+        if os.path.getsize(caminho_arquivo) > self.limite_bytes_leitura:
+            return None
+        with open(caminho_arquivo, 'rb') as arquivo:
+            return arquivo.read()
+
+    async def _extrair(self, limite_leituras, caminho_arquivo):
+        loop = asyncio.get_running_loop()
+        try:
+            # The permit is only released after extraction has consumed the bytes read, so
+            # at most max_leituras files are held in memory (max_leituras × limite_bytes_leitura)
+            async with limite_leituras:
+                dados = await loop.run_in_executor(self._executor_leitura, self._ler_arquivo, caminho_arquivo)
+                return await loop.run_in_executor(
+                    self.executor, self.extrator.extrair_metadados_arquivo, caminho_arquivo, None, dados
+                )
+        except Exception as e:
+            logger.error(f"Error processing {caminho_arquivo}: {e}")
+            return {
+                "nome_arquivo": os.path.basename(caminho_arquivo),
+                "caminho_arquivo": caminho_arquivo,
+                "erro": str(e)
+            }
+
+    async def extrair_metadados(self, caminhos):
+        """
+        Extracts the metadata of each path (regular or async iterable).
+        Yields results in input order; if the consumer falls behind, reading stops.
+        """
+        if self._executor_leitura is None:
+            self._executor_leitura = ThreadPoolExecutor(
+                max_workers=self.max_leituras, thread_name_prefix="leitura_metadados"
+            )
+        limite_leituras = asyncio.Semaphore(self.max_leituras)
+        fila = asyncio.Queue(maxsize=self.max_pendentes)
+
+        async def enfileirar(caminho_arquivo):
+            tarefa = asyncio.ensure_future(self._extrair(limite_leituras, caminho_arquivo))
+            try:
+                await fila.put(tarefa)
+            except asyncio.CancelledError:
+                tarefa.cancel()
+                raise
+
+        async def produzir():
+            try:
+                if hasattr(caminhos, '__aiter__'):
+                    async for caminho_arquivo in caminhos:
+                        await enfileirar(caminho_arquivo)
+                else:
+                    for caminho_arquivo in caminhos:
+                        await enfileirar(caminho_arquivo)
+            except Exception as e:
+                await fila.put(e)
+                return
+            await fila.put(None)
+
+        produtor = asyncio.ensure_future(produzir())
+        tarefa = None
+        try:
+            while True:
+                tarefa = await fila.get()
+                if tarefa is None:
+                    break
+                if isinstance(tarefa, Exception):
+                    raise tarefa
+                yield await tarefa
+        finally:
+            # Consumer stopped early: cancel whatever is still pending
+            produtor.cancel()
+            if isinstance(tarefa, asyncio.Future):
+                tarefa.cancel()
+            while not fila.empty():
+                pendente = fila.get_nowait()
+                if isinstance(pendente, asyncio.Future):
+                    pendente.cancel()
+
+    async def extrair_diretorio(self):
+        """
+        Extracts the metadata of every supported file in the base directory
+        """
+        loop = asyncio.get_running_loop()
+        arquivos_alvo = await loop.run_in_executor(None, self.extrator.listar_arquivos_suportados)
+        async for info_arquivo in self.extrair_metadados(item[0] for item in arquivos_alvo):
+            yield info_arquivo
+
 def main():
+    # Command-line options
+    parser = argparse.ArgumentParser(description="Advanced metadata extraction")
+    parser.add_argument(
+        "--log-level", dest="nivel_log", default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging level (DEBUG includes the per-image diagnostic)"
+    )
+    parser.add_argument("--log-file", dest="arquivo_log", help="Write logs to this file instead of the terminal")
+    parser.add_argument(
+        "--progress-jsonl", dest="arquivo_progresso",
+        help="Write progress as JSON Lines to this file (for orchestration)"
+    )
+    parser.add_argument(
+        "--no-progress", dest="mostrar_progresso", action="store_false", default=None,
+        help="Do not show the progress line (by default it only appears when stderr is a terminal)"
+    )
+    parser.add_argument(
+        "--no-hash", dest="calcular_hash", action="store_false",
+        help="Do not compute each file's SHA-256 (avoids a second read; comparison uses size and date)"
+    )
+    parser.add_argument(
+        "--compare", dest="relatorio_anterior", metavar="REPORT",
+        help="Compare this run with a previous report and generate a differential report"
+    )
+    argumentos = parser.parse_args()
+
+    configurar_logging(getattr(logging, argumentos.nivel_log), argumentos.arquivo_log)
+
     # Directory path for analysis
     diretorio_base = r"C:\Users\InFuture\Desktop\CyberInvestigations\METADADOS"
 
@@ -313,6 +1029,14 @@ def main():
         print("Create the directory or check the path.")
         return
 
+    # Check the previous report before an extraction that may take hours
+    if argumentos.relatorio_anterior:
+        try:
+            validar_relatorio(argumentos.relatorio_anterior)
+        except (ValueError, OSError) as e:
+            print(f"❌ Previous report cannot be compared: {e}")
+            return
+
     # Test library installation
     testar_instalacao_bibliotecas()
 
@@ -320,7 +1044,12 @@ def main():
     print("="*50)
 
     # Create extractor
-    extrator = MetadataExtractor(diretorio_base)
+    extrator = MetadataExtractor(
+        diretorio_base,
+        mostrar_progresso=argumentos.mostrar_progresso,
+        arquivo_progresso=argumentos.arquivo_progresso,
+        calcular_hash=argumentos.calcular_hash
+    )
 
     # Process directory
     resultados = extrator.processar_diretorio()
@@ -346,5 +1075,20 @@ def main():
     if len(resultados['arquivos_processados']) > 5:
         print(f"\n... and {len(resultados['arquivos_processados']) - 5} more files (see full JSON report)")
 
+    # Differential report against a previous run
+    if argumentos.relatorio_anterior:
+        try:
+            resumo = extrator.gerar_relatorio_diferencial(argumentos.relatorio_anterior)
+        except (ValueError, OSError) as e:
+            print(f"❌ Failed to generate the differential report: {e}")
+            return
+        print("\n🔀 Differences from the previous report:")
+        print(f"Added: {resumo['adicionado']}")
+        print(f"Removed: {resumo['removido']}")
+        print(f"Modified: {resumo['modificado']}")
+        print(f"Metadata changed: {resumo['metadados_alterados']}")
+        print(f"Only modification date changed: {resumo['data_modificacao_alterada']}")
+        print(f"Same content, different extraction: {resumo['extracao_alterada']}")
+
 if __name__ == "__main__":
     main()
@@ -1,12 +1,91 @@
 import os
 import subprocess
 import json
+import io
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import re
 from datetime import datetime
 import sys
+import argparse
+import logging
+import logging.handlers
+import time
 
 # Os arquivos devem ser colocados dentro da pasta de destino, que nesse caso é METADADOS!
 # C:\Users\InFuture\Desktop\CyberInvestigations\METADADOS
 
+# Logger do módulo: diagnósticos ficam em DEBUG e não aparecem por padrão
+logger = logging.getLogger("metadados")
+
+# Linha de progresso exibida no momento (apagada e redesenhada a cada mensagem de log)
+_progresso_ativo = None
+
+# Handler em buffer instalado por configurar_logging no logger raiz
+_handler_buffer = None
+
+# Extensões de arquivo suportadas
+EXTENSOES_SUPORTADAS = [
+    '.pdf', '.docx', '.doc',
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'
+]
+
+class _HandlerTerminal(logging.StreamHandler):
+    """
+    StreamHandler que apaga a linha de progresso antes de cada mensagem e a redesenha depois
+    """
+    def emit(self, record):
+        progresso = _progresso_ativo
+        if progresso is not None:
+            progresso.limpar_linha()
+        super().emit(record)
+        if progresso is not None:
+            progresso.redesenhar()
+
+def configurar_logging(nivel=logging.WARNING, arquivo_log=None, capacidade_buffer=500):
+    """
+    Configura o logging com buffer em memória.
+    Mensagens são acumuladas e gravadas em lote; erros forçam a gravação imediata.
+    O buffer fica no logger raiz, então avisos de bibliotecas (exifread, Pillow...) também
+    passam por ele; esses avisos só aparecem com nível INFO ou DEBUG.
+    """
+    if arquivo_log:
+        destino = logging.FileHandler(arquivo_log, encoding='utf-8')
+    else:
+        destino = _HandlerTerminal(sys.stderr)
+    destino.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    buffer = logging.handlers.MemoryHandler(
+        capacidade_buffer, flushLevel=logging.ERROR, target=destino
+    )
+
+    # Remover handlers de configurações anteriores
+    global _handler_buffer
+    raiz = logging.getLogger()
+    if _handler_buffer is not None:
+        raiz.removeHandler(_handler_buffer)
+        _handler_buffer.close()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    # Bibliotecas de terceiros herdam o nível da raiz: um aviso por arquivo (ex.: PNG sem
+    # EXIF) não pode aparecer no caminho crítico com o nível padrão
+    raiz.setLevel(nivel if nivel < logging.WARNING else max(nivel, logging.ERROR))
+    raiz.addHandler(buffer)
+    _handler_buffer = buffer
+
+    logger.setLevel(nivel)
+    logger.propagate = True
+
+def descarregar_logs():
+    """
+    Grava imediatamente as mensagens acumuladas no buffer de logging
+    """
+    if _handler_buffer is not None:
+        _handler_buffer.flush()
+
 # Verificação e importação de bibliotecas
 def testar_instalacao_bibliotecas():
     """
@@ -66,6 +145,7 @@ try:
     from PIL.ExifTags import TAGS
     import exifread
     import cv2
+    import numpy as np
     import piexif
 except ImportError as e:
     print(f"Erro na importação: {e}")
@@ -92,67 +172,446 @@ def converter_coordenadas_gps(coordenadas, referencia):
         
         return coordenada_decimal
     except Exception as e:
-        print(f"Erro na conversão de coordenadas GPS: {e}")
+        logger.warning(f"Erro na conversão de coordenadas GPS: {e}")
         return None
 
-def verificar_imagem(caminho_arquivo):
+def ler_imagem_opencv(caminho_arquivo, dados=None):
     """
-    Função de diagnóstico para imagens
+    Carrega a imagem com OpenCV a partir do caminho ou de bytes já lidos
     """
-    print("\n🔬 Diagnóstico de Imagem:")
-    print(f"Arquivo: {caminho_arquivo}")
-    
+    if dados is None:
+        return cv2.imread(caminho_arquivo)
+    return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+def abrir_binario(caminho_arquivo, dados=None):
+    """
+    Abre o arquivo em modo binário, ou bytes já lidos como um arquivo em memória
+    """
+    if dados is None:
+        return open(caminho_arquivo, 'rb')
+    return io.BytesIO(dados)
+
+# Representação de um arquivo em memória que as bibliotecas colocam nas mensagens de erro
+_REPR_BYTESIO = re.compile(r"'?<_io\.BytesIO object at 0x[0-9a-fA-F]+>'?")
+
+def descrever_erro(erro, caminho_arquivo):
+    """
+    Texto do erro com o caminho do arquivo no lugar do arquivo em memória, para que
+    a mensagem seja a mesma com ou sem leitura antecipada
+    """
+    # Entre aspas (formato '%s', ex.: python-docx) vira o caminho entre aspas; senão, o %r do caminho
+    def substituir(encontrado):
+        if encontrado.group().startswith("'"):
+            return f"'{caminho_arquivo}'"
+        return repr(caminho_arquivo)
+
+    return _REPR_BYTESIO.sub(substituir, str(erro))
+
+def verificar_imagem(caminho_arquivo, dados=None):
+    """
+    Função de diagnóstico para imagens.
+    Só é executada com o logging em nível DEBUG, pois abre a imagem duas vezes.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    logger.debug(f"🔬 Diagnóstico de Imagem: {caminho_arquivo}")
+
     try:
         # Verificação com Pillow
-        with Image.open(caminho_arquivo) as img:
-            print(f"✅ Pillow: Imagem carregada com sucesso")
-            print(f"Formato: {img.format}")
-            print(f"Modo: {img.mode}")
-            print(f"Tamanho: {img.size}")
+        with Image.open(io.BytesIO(dados) if dados is not None else caminho_arquivo) as img:
+            logger.debug(f"✅ Pillow: formato={img.format} modo={img.mode} tamanho={img.size}")
     except Exception as e:
-        print(f"❌ Erro no Pillow: {e}")
-    
+        logger.debug(f"❌ Erro no Pillow: {descrever_erro(e, caminho_arquivo)}")
+
     try:
         # Verificação com OpenCV
-        imagem = cv2.imread(caminho_arquivo)
+        imagem = ler_imagem_opencv(caminho_arquivo, dados)
         if imagem is not None:
-            print(f"✅ OpenCV: Imagem carregada com sucesso")
-            print(f"Dimensões: {imagem.shape}")
+            logger.debug(f"✅ OpenCV: dimensões={imagem.shape}")
         else:
-            print("❌ OpenCV: Falha ao carregar imagem")
+            logger.debug("❌ OpenCV: Falha ao carregar imagem")
     except Exception as e:
-        print(f"❌ Erro no OpenCV: {e}")
+        logger.debug(f"❌ Erro no OpenCV: {e}")
+
+def formatar_duracao(segundos):
+    """
+    Formata uma duração em segundos como HH:MM:SS
+    """
+    if segundos is None:
+        return "--:--:--"
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+class ProgressoExtracao:
+    """
+    Progresso da extração: uma única linha atualizada no terminal
+    (arquivos/s, MB/s, contagem por formato, erros e ETA) e, opcionalmente,
+    um fluxo JSON Lines legível por máquina para orquestração.
+    """
+    def __init__(self, total_arquivos, total_bytes, mostrar=None, arquivo_jsonl=None, intervalo=0.5):
+        self.total_arquivos = total_arquivos
+        self.total_bytes = total_bytes
+        # Por padrão só exibe a linha em um terminal; logs capturados usam o fluxo JSONL
+        if mostrar is None:
+            mostrar = sys.stderr is not None and sys.stderr.isatty()
+        self.mostrar = mostrar
+        self.intervalo = intervalo
+        self.arquivos = 0
+        self.bytes = 0
+        self.erros = 0
+        self.por_formato = {}
+        self.inicio = time.monotonic()
+        self._ultima_emissao = 0.0
+        self._largura_linha = 0
+        self._linha = ''
+        self._jsonl = open(arquivo_jsonl, 'a', encoding='utf-8') if arquivo_jsonl else None
+
+        global _progresso_ativo
+        if self.mostrar:
+            _progresso_ativo = self
+
+    def registrar(self, formato, tamanho_bytes, erro=False):
+        """
+        Registra um arquivo processado e atualiza a exibição se o intervalo passou
+        """
+        self.arquivos += 1
+        self.bytes += tamanho_bytes
+        self.por_formato[formato] = self.por_formato.get(formato, 0) + 1
+        if erro:
+            self.erros += 1
+
+        agora = time.monotonic()
+        if agora - self._ultima_emissao >= self.intervalo:
+            self._emitir(agora, "progresso")
+
+    def estado(self, agora=None):
+        """
+        Retorna o estado atual do progresso como dicionário
+        """
+        if agora is None:
+            agora = time.monotonic()
+        decorrido = max(agora - self.inicio, 1e-9)
+        bytes_por_segundo = self.bytes / decorrido
+        bytes_restantes = max(self.total_bytes - self.bytes, 0)
+
+        if bytes_restantes == 0:
+            eta = 0.0
+        elif bytes_por_segundo > 0:
+            eta = bytes_restantes / bytes_por_segundo
+        else:
+            eta = None
+
+        return {
+            "arquivos": self.arquivos,
+            "total_arquivos": self.total_arquivos,
+            "bytes": self.bytes,
+            "total_bytes": self.total_bytes,
+            "erros": self.erros,
+            "por_formato": dict(self.por_formato),
+            "arquivos_por_segundo": round(self.arquivos / decorrido, 2),
+            "mb_por_segundo": round(bytes_por_segundo / (1024 * 1024), 2),
+            "decorrido_segundos": round(decorrido, 2),
+            "eta_segundos": None if eta is None else round(eta, 2)
+        }
+
+    def _emitir(self, agora, evento):
+        self._ultima_emissao = agora
+        estado = self.estado(agora)
+
+        if self.mostrar:
+            formatos = " ".join(f"{fmt}:{qtd}" for fmt, qtd in sorted(estado["por_formato"].items()))
+            linha = (
+                f"⏳ {estado['arquivos']}/{estado['total_arquivos']} arquivos"
+                f" | {estado['arquivos_por_segundo']:.1f} arq/s"
+                f" | {estado['mb_por_segundo']:.1f} MB/s"
+                f" | {formatos or '-'}"
+                f" | erros: {estado['erros']}"
+                f" | ETA {formatar_duracao(estado['eta_segundos'])}"
+            )
+            # Completar com espaços para apagar restos de uma linha anterior mais longa
+            self._largura_linha = max(self._largura_linha, len(linha))
+            self._linha = linha
+            sys.stderr.write("\r" + linha.ljust(self._largura_linha))
+            sys.stderr.flush()
+
+        if self._jsonl:
+            estado["evento"] = evento
+            estado["timestamp"] = datetime.now().isoformat()
+            self._jsonl.write(json.dumps(estado, ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+
+    def limpar_linha(self):
+        """
+        Apaga a linha de progresso do terminal
+        """
+        if self.mostrar and self._largura_linha:
+            # +2: o emoji inicial pode ocupar duas colunas
+            sys.stderr.write("\r" + " " * (self._largura_linha + 2) + "\r")
+            sys.stderr.flush()
+
+    def redesenhar(self):
+        """
+        Redesenha a última linha de progresso exibida
+        """
+        if self.mostrar and self._linha:
+            sys.stderr.write("\r" + self._linha.ljust(self._largura_linha))
+            sys.stderr.flush()
+
+    def finalizar(self):
+        """
+        Emite o estado final e encerra a linha de progresso
+        """
+        self._emitir(time.monotonic(), "fim")
+        if self.mostrar:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+        global _progresso_ativo
+        if _progresso_ativo is self:
+            _progresso_ativo = None
+        if self._jsonl:
+            self._jsonl.close()
+            self._jsonl = None
+
+def calcular_hash_arquivo(caminho_arquivo, tamanho_bloco=1024 * 1024):
+    """
+    Calcula o hash SHA-256 do conteúdo de um arquivo, lendo em blocos
+    """
+    sha256 = hashlib.sha256()
+    with open(caminho_arquivo, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            sha256.update(bloco)
+    return sha256.hexdigest()
+
+# Separadores entre entradas da lista de arquivos de um relatório JSON
+_SEPARADORES_JSON = re.compile(r'[\s,:]*')
+
+def ler_relatorio_em_fluxo(caminho_relatorio, tamanho_bloco=1024 * 1024):
+    """
+    Lê uma a uma as entradas da lista arquivos_processados de um relatório JSON,
+    sem carregar o relatório inteiro na memória
+    """
+    decodificador = json.JSONDecoder()
+    marcador = '"arquivos_processados"'
+
+    with open(caminho_relatorio, 'r', encoding='utf-8') as f:
+        # Localizar o início da lista de arquivos
+        buffer = ''
+        while True:
+            bloco = f.read(tamanho_bloco)
+            if not bloco:
+                raise ValueError(f"Relatório sem lista de arquivos: {caminho_relatorio}")
+            buffer = buffer[-len(marcador):] + bloco
+            inicio = buffer.find(marcador)
+            if inicio >= 0:
+                buffer = buffer[inicio + len(marcador):]
+                break
+
+        pos = 0
+        lista_aberta = False
+        while True:
+            pos = _SEPARADORES_JSON.match(buffer, pos).end()
+            if pos >= len(buffer):
+                bloco = f.read(tamanho_bloco)
+                if not bloco:
+                    raise ValueError(f"Relatório truncado: {caminho_relatorio}")
+                buffer, pos = bloco, 0
+                continue
+
+            if not lista_aberta:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Lista de arquivos inválida: {caminho_relatorio}")
+                lista_aberta = True
+                pos += 1
+                continue
+
+            if buffer[pos] == ']':
+                return
+
+            try:
+                entrada, fim = decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Entrada incompleta no buffer: ler mais um bloco
+                bloco = f.read(tamanho_bloco)
+                if not bloco:
+                    raise ValueError(f"Relatório truncado ou inválido: {caminho_relatorio}")
+                buffer, pos = buffer[pos:] + bloco, 0
+                continue
+
+            yield entrada
+            pos = fim
+
+def _entradas_ordenadas(caminho_relatorio):
+    """
+    Gera pares (chave, entrada) de um relatório, exigindo ordem crescente de chave
+    """
+    anterior = None
+    for entrada in ler_relatorio_em_fluxo(caminho_relatorio):
+        chave = entrada.get("caminho_relativo") or entrada.get("caminho_arquivo")
+        if anterior is not None and chave <= anterior:
+            raise ValueError(
+                f"Relatório não está ordenado por caminho (gere-o novamente com esta versão): {caminho_relatorio}"
+            )
+        anterior = chave
+        yield chave, entrada
+
+def validar_relatorio(caminho_relatorio):
+    """
+    Percorre um relatório para conferir que ele pode ser comparado (existe, é válido
+    e está ordenado por caminho). Retorna o número de entradas.
+    """
+    total = 0
+    for _ in _entradas_ordenadas(caminho_relatorio):
+        total += 1
+    return total
+
+# Campos que identificam o arquivo e não entram na comparação
+CAMPOS_IDENTIFICACAO = {"nome_arquivo", "caminho_arquivo", "caminho_relativo"}
+
+# Campos do sistema de arquivos que não são metadados embutidos no conteúdo
+CAMPOS_SISTEMA_ARQUIVOS = {"hash_sha256", "data_criacao", "data_modificacao"}
+
+# Metadados embutidos no arquivo (EXIF, propriedades do PDF e do DOCX, GPS)
+PREFIXOS_METADADOS_EMBUTIDOS = ("exif_tags.", "metadados.", "coordenadas_gps.")
+CAMPOS_METADADOS_EMBUTIDOS = {"autor", "criado_em", "modificado_em", "categoria", "palavras_chave"}
+
+def _metadado_embutido(campo):
+    return campo in CAMPOS_METADADOS_EMBUTIDOS or campo.startswith(PREFIXOS_METADADOS_EMBUTIDOS)
+
+def _achatar(dados, prefixo=''):
+    """
+    Achata dicionários aninhados em chaves no formato pai.filho
+    """
+    planos = {}
+    for chave, valor in dados.items():
+        if not prefixo and chave in CAMPOS_IDENTIFICACAO:
+            continue
+        nome = f"{prefixo}{chave}"
+        if isinstance(valor, dict):
+            planos.update(_achatar(valor, nome + "."))
+        else:
+            planos[nome] = valor
+    return planos
+
+def comparar_entradas(anterior, atual):
+    """
+    Compara duas entradas do mesmo arquivo.
+    Retorna a diferença encontrada ou None se nada mudou.
+    """
+    planos_anterior = _achatar(anterior)
+    planos_atual = _achatar(atual)
+    campos_alterados = {
+        campo: {"anterior": planos_anterior.get(campo), "atual": planos_atual.get(campo)}
+        for campo in sorted(set(planos_anterior) | set(planos_atual))
+        if planos_anterior.get(campo) != planos_atual.get(campo)
+    }
+    if not campos_alterados:
+        return None
+
+    # Conteúdo: hash quando os dois lados o têm; senão tamanho e data de modificação
+    hash_anterior = anterior.get("hash_sha256")
+    hash_atual = atual.get("hash_sha256")
+    if hash_anterior and hash_atual:
+        conteudo_alterado = hash_anterior != hash_atual
+    else:
+        conteudo_alterado = (
+            anterior.get("tamanho_bytes") != atual.get("tamanho_bytes")
+            or anterior.get("data_modificacao") != atual.get("data_modificacao")
+        )
+
+    if not conteudo_alterado:
+        # Mesmo conteúdo: datas do sistema de arquivos (touch, chmod, cópia para outro disco)
+        # não contam como alteração
+        campos_alterados = {
+            campo: valores for campo, valores in campos_alterados.items()
+            if campo not in CAMPOS_SISTEMA_ARQUIVOS
+        } or {
+            campo: valores for campo, valores in campos_alterados.items()
+            if campo == "data_modificacao" and hash_anterior and hash_atual
+        }
+        if not campos_alterados:
+            return None
+
+    # Classificação pelos campos alterados: editar o EXIF ou o Producer de um PDF também
+    # muda os bytes, então o hash sozinho não distingue edição de metadados
+    if any(_metadado_embutido(campo) for campo in campos_alterados):
+        status = "metadados_alterados"
+    elif conteudo_alterado:
+        status = "modificado"
+    elif "data_modificacao" in campos_alterados:
+        status = "data_modificacao_alterada"
+    else:
+        # Mesmos bytes, mas o resultado da extração mudou (ex.: outra versão de biblioteca)
+        status = "extracao_alterada"
+
+    return {
+        "status": status,
+        "caminho_relativo": atual.get("caminho_relativo") or atual.get("caminho_arquivo"),
+        "conteudo_alterado": conteudo_alterado,
+        "campos_alterados": campos_alterados
+    }
+
+def comparar_relatorios(relatorio_anterior, relatorio_atual):
+    """
+    Compara dois relatórios percorrendo ambos em ordem de caminho (memória limitada).
+    Gera apenas as diferenças: adicionado, removido, modificado, metadados_alterados
+    (metadados embutidos mudaram), data_modificacao_alterada (mesmo conteúdo, só a data
+    de modificação mudou) ou extracao_alterada (mesmo conteúdo, extração diferente).
+    """
+    anteriores = _entradas_ordenadas(relatorio_anterior)
+    atuais = _entradas_ordenadas(relatorio_atual)
+    anterior = next(anteriores, None)
+    atual = next(atuais, None)
+
+    while anterior is not None or atual is not None:
+        if atual is None or (anterior is not None and anterior[0] < atual[0]):
+            yield {"status": "removido", "caminho_relativo": anterior[0], "anterior": anterior[1]}
+            anterior = next(anteriores, None)
+        elif anterior is None or atual[0] < anterior[0]:
+            yield {"status": "adicionado", "caminho_relativo": atual[0], "atual": atual[1]}
+            atual = next(atuais, None)
+        else:
+            diferenca = comparar_entradas(anterior[1], atual[1])
+            if diferenca:
+                yield diferenca
+            anterior = next(anteriores, None)
+            atual = next(atuais, None)
 
 class MetadataExtractor:
-    def __init__(self, diretorio_base):
+    def __init__(self, diretorio_base, mostrar_progresso=None, arquivo_progresso=None, calcular_hash=True):
         self.diretorio_base = diretorio_base
+        self.mostrar_progresso = mostrar_progresso
+        self.arquivo_progresso = arquivo_progresso
+        self.calcular_hash = calcular_hash
+        self.ultimo_relatorio = None
         self.diretorio_resultados = os.path.join(diretorio_base, "RESULTADOS_METADADOS")
         os.makedirs(self.diretorio_resultados, exist_ok=True)
 
-    def extrair_metadados_imagem(self, caminho_arquivo):
+    def extrair_metadados_imagem(self, caminho_arquivo, dados=None):
         """
         Extrai metadados detalhados de imagens
         """
         try:
             # Diagnóstico de imagem
-            verificar_imagem(caminho_arquivo)
+            verificar_imagem(caminho_arquivo, dados)
             
             # Extração com Pillow
-            imagem_pil = Image.open(caminho_arquivo)
+            imagem_pil = Image.open(io.BytesIO(dados) if dados is not None else caminho_arquivo)
             
             # Extração com ExifRead
-            with open(caminho_arquivo, 'rb') as img_file:
+            with abrir_binario(caminho_arquivo, dados) as img_file:
                 exif_tags = exifread.process_file(img_file, details=False)
             
             # Análise com OpenCV - com tratamento de erro
             try:
-                imagem_cv2 = cv2.imread(caminho_arquivo)
+                imagem_cv2 = ler_imagem_opencv(caminho_arquivo, dados)
                 if imagem_cv2 is not None:
                     altura, largura, canais = imagem_cv2.shape
                 else:
                     altura, largura, canais = 0, 0, 0
             except Exception as e:
-                print(f"Erro ao ler imagem com OpenCV: {e}")
+                logger.warning(f"Erro ao ler imagem com OpenCV: {e}")
                 altura, largura, canais = 0, 0, 0
 
             # Processamento de coordenadas GPS
@@ -178,7 +637,7 @@ class MetadataExtractor:
                             "link_maps": f"https://www.google.com/maps?q={latitude},{longitude}"
                         }
             except Exception as e:
-                print(f"Erro ao processar GPS: {e}")
+                logger.warning(f"Erro ao processar GPS: {e}")
 
             # Montagem do dicionário de metadados
             info_imagem = {
@@ -200,14 +659,14 @@ class MetadataExtractor:
 
             return info_imagem
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
 
-    def extrair_metadados_pdf(self, caminho_arquivo):
+    def extrair_metadados_pdf(self, caminho_arquivo, dados=None):
         """
         Extrai metadados de arquivos PDF
         """
         try:
-            with open(caminho_arquivo, 'rb') as arquivo:
+            with abrir_binario(caminho_arquivo, dados) as arquivo:
                 leitor_pdf = PyPDF2.PdfReader(arquivo)
                 metadados = leitor_pdf.metadata or {}
                 
@@ -220,14 +679,14 @@ class MetadataExtractor:
                 }
                 return info_pdf
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
 
-    def extrair_metadados_docx(self, caminho_arquivo):
+    def extrair_metadados_docx(self, caminho_arquivo, dados=None):
         """
         Extrai metadados de arquivos DOCX
         """
         try:
-            documento = docx.Document(caminho_arquivo)
+            documento = docx.Document(io.BytesIO(dados) if dados is not None else caminho_arquivo)
             propriedades = documento.core_properties
             
             info_docx = {
@@ -240,7 +699,78 @@ class MetadataExtractor:
             }
             return info_docx
         except Exception as e:
-            return {"erro": str(e)}
+            return {"erro": descrever_erro(e, caminho_arquivo)}
+
+    def extrair_metadados_arquivo(self, caminho_completo, caminho_relativo=None, dados=None):
+        """
+        Extrai as informações básicas e os metadados específicos de um arquivo.
+        Se dados for informado, usa esses bytes já lidos em vez de ler o arquivo de novo.
+        """
+        arquivo = os.path.basename(caminho_completo)
+        extensao = os.path.splitext(arquivo)[1].lower()
+        if caminho_relativo is None:
+            caminho_relativo = os.path.relpath(caminho_completo, self.diretorio_base).replace(os.sep, '/')
+        estatisticas = os.stat(caminho_completo)
+
+        # Hash do conteúdo; uma falha de leitura fica registrada na entrada em vez de descartá-la
+        hash_sha256 = None
+        erro_hash = None
+        if dados is not None:
+            hash_sha256 = hashlib.sha256(dados).hexdigest()
+        elif self.calcular_hash:
+            try:
+                hash_sha256 = calcular_hash_arquivo(caminho_completo)
+            except OSError as e:
+                erro_hash = f"Erro ao calcular hash: {e}"
+
+        # Informações básicas do arquivo
+        info_arquivo = {
+            "nome_arquivo": arquivo,
+            "caminho_arquivo": caminho_completo,
+            "caminho_relativo": caminho_relativo,
+            "tamanho_bytes": estatisticas.st_size,
+            "hash_sha256": hash_sha256,
+            "data_criacao": datetime.fromtimestamp(estatisticas.st_ctime).isoformat(),
+            "data_modificacao": datetime.fromtimestamp(estatisticas.st_mtime).isoformat()
+        }
+
+        # Extração de metadados específica por tipo
+        if extensao == '.pdf':
+            metadados = self.extrair_metadados_pdf(caminho_completo, dados)
+        elif extensao in ['.docx', '.doc']:
+            metadados = self.extrair_metadados_docx(caminho_completo, dados)
+        elif extensao in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
+            metadados = self.extrair_metadados_imagem(caminho_completo, dados)
+        else:
+            metadados = {"erro": f"Extensão não suportada: {extensao}"}
+
+        # Combinar informações
+        info_arquivo.update(metadados)
+        if erro_hash and "erro" not in info_arquivo:
+            info_arquivo["erro"] = erro_hash
+        return info_arquivo
+
+    def listar_arquivos_suportados(self):
+        """
+        Pré-varredura do diretório: lista os arquivos suportados com seus tamanhos,
+        ordenados pelo caminho relativo (ordem usada pelos relatórios diferenciais)
+        """
+        arquivos_alvo = []
+        for pasta_raiz, _, arquivos in os.walk(self.diretorio_base):
+            for arquivo in arquivos:
+                extensao = os.path.splitext(arquivo)[1].lower()
+                if extensao not in EXTENSOES_SUPORTADAS:
+                    continue
+                caminho_completo = os.path.join(pasta_raiz, arquivo)
+                try:
+                    tamanho = os.path.getsize(caminho_completo)
+                except OSError as e:
+                    logger.error(f"Erro ao acessar {caminho_completo}: {e}")
+                    continue
+                caminho_relativo = os.path.relpath(caminho_completo, self.diretorio_base).replace(os.sep, '/')
+                arquivos_alvo.append((caminho_completo, caminho_relativo, arquivo, extensao, tamanho))
+        arquivos_alvo.sort(key=lambda item: item[1])
+        return arquivos_alvo
 
     def processar_diretorio(self):
         """
@@ -251,45 +781,34 @@ class MetadataExtractor:
             "arquivos_processados": []
         }
 
-        # Extensões de arquivo suportadas
-        extensoes_suportadas = [
-            '.pdf', '.docx', '.doc', 
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'
-        ]
+        # Pré-varredura para conhecer o total de bytes (base do ETA)
+        arquivos_alvo = self.listar_arquivos_suportados()
+        progresso = ProgressoExtracao(
+            len(arquivos_alvo),
+            sum(item[-1] for item in arquivos_alvo),
+            mostrar=self.mostrar_progresso,
+            arquivo_jsonl=self.arquivo_progresso
+        )
 
-        # Varredura recursiva do diretório
-        for pasta_raiz, _, arquivos in os.walk(self.diretorio_base):
-            for arquivo in arquivos:
-                caminho_completo = os.path.join(pasta_raiz, arquivo)
-                extensao = os.path.splitext(arquivo)[1].lower()
-                
-                # Processar apenas arquivos suportados
-                if extensao in extensoes_suportadas:
-                    try:
-                        # Informações básicas do arquivo
-                        info_arquivo = {
-                            "nome_arquivo": arquivo,
-                            "caminho_arquivo": caminho_completo,
-                            "tamanho_bytes": os.path.getsize(caminho_completo),
-                            "data_criacao": datetime.fromtimestamp(os.path.getctime(caminho_completo)).isoformat(),
-                            "data_modificacao": datetime.fromtimestamp(os.path.getmtime(caminho_completo)).isoformat()
-                        }
+        try:
+            for caminho_completo, caminho_relativo, arquivo, extensao, tamanho in arquivos_alvo:
+                erro = False
+                try:
+                    info_arquivo = self.extrair_metadados_arquivo(caminho_completo, caminho_relativo)
+
+                    if "erro" in info_arquivo:
+                        erro = True
+                        logger.info(f"Falha na extração de {caminho_completo}: {info_arquivo['erro']}")
 
-                        # Extração de metadados específica por tipo
-                        if extensao == '.pdf':
-                            metadados = self.extrair_metadados_pdf(caminho_completo)
-                        elif extensao in ['.docx', '.doc']:
-                            metadados = self.extrair_metadados_docx(caminho_completo)
-                        elif extensao in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']:
-                            metadados = self.extrair_metadados_imagem(caminho_completo)
-                        else:
-                            continue
-
-                        # Combinar informações
-                        info_arquivo.update(metadados)
-                        resultados["arquivos_processados"].append(info_arquivo)
-                    except Exception as e:
-                        print(f"Erro ao processar {arquivo}: {e}")
+                    resultados["arquivos_processados"].append(info_arquivo)
+                except Exception as e:
+                    erro = True
+                    logger.error(f"Erro ao processar {arquivo}: {e}")
+                finally:
+                    progresso.registrar(extensao.lstrip('.').upper(), tamanho, erro)
+        finally:
+            progresso.finalizar()
+            descarregar_logs()
 
         # Salvar resultados em JSON
         arquivo_saida = os.path.join(
@@ -301,9 +820,206 @@ class MetadataExtractor:
             json.dump(resultados, f, indent=4, ensure_ascii=False)
         
         print(f"\n📄 Relatório salvo em: {arquivo_saida}")
+        self.ultimo_relatorio = arquivo_saida
         return resultados
 
+    def gerar_relatorio_diferencial(self, relatorio_anterior, relatorio_atual=None):
+        """
+        Gera um relatório apenas com as diferenças entre um relatório anterior e o atual.
+        Sem relatorio_atual, usa o último relatório gerado por processar_diretorio.
+        """
+        if relatorio_atual is None:
+            relatorio_atual = self.ultimo_relatorio
+        if relatorio_atual is None:
+            raise ValueError("Nenhum relatório atual: execute processar_diretorio primeiro")
+
+        resumo = {
+            "adicionado": 0, "removido": 0, "modificado": 0,
+            "metadados_alterados": 0, "data_modificacao_alterada": 0, "extracao_alterada": 0
+        }
+        arquivo_saida = os.path.join(
+            self.diretorio_resultados,
+            f"diferencas_metadados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+
+        # Gravação em fluxo: cada diferença é escrita assim que encontrada, em um arquivo
+        # temporário que só é renomeado quando a comparação termina sem erro
+        arquivo_temporario = arquivo_saida + ".tmp"
+        try:
+            with open(arquivo_temporario, 'w', encoding='utf-8') as f:
+                f.write("{\n")
+                f.write(f'    "data_processamento": {json.dumps(datetime.now().isoformat())},\n')
+                f.write(f'    "relatorio_anterior": {json.dumps(relatorio_anterior, ensure_ascii=False)},\n')
+                f.write(f'    "relatorio_atual": {json.dumps(relatorio_atual, ensure_ascii=False)},\n')
+                f.write('    "diferencas": [')
+                for diferenca in comparar_relatorios(relatorio_anterior, relatorio_atual):
+                    if sum(resumo.values()):
+                        f.write(",")
+                    texto = json.dumps(diferenca, indent=4, ensure_ascii=False, default=str)
+                    f.write("\n        " + texto.replace("\n", "\n        "))
+                    resumo[diferenca["status"]] += 1
+                f.write("\n    ],\n")
+                f.write('    "resumo": ' + json.dumps(resumo, indent=4).replace("\n", "\n    ") + "\n}\n")
+        except BaseException:
+            if os.path.exists(arquivo_temporario):
+                os.remove(arquivo_temporario)
+            raise
+        os.replace(arquivo_temporario, arquivo_saida)
+
+        print(f"\n🔀 Relatório diferencial salvo em: {arquivo_saida}")
+        return resumo
+
+class AsyncMetadataExtractor:
+    """
+    Front end assíncrono para o MetadataExtractor.
+    Lê os arquivos antecipadamente com concorrência limitada (útil em NFS/SMB), enquanto
+    a extração roda em um executor de threads ou processos. Os resultados saem por um
+    iterador assíncrono; no máximo max_pendentes arquivos ficam em andamento por vez e
+    no máximo max_leituras têm seus bytes na memória (sendo lidos ou aguardando extração).
+    """
+    def __init__(self, extrator, max_leituras=8, max_pendentes=32, executor=None,
+                 limite_bytes_leitura=64 * 1024 * 1024):
+        self.extrator = extrator
+        self.max_leituras = max_leituras
+        self.max_pendentes = max_pendentes
+        # None usa o executor padrão do loop (threads); um ProcessPoolExecutor também serve
+        self.executor = executor
+        # Arquivos maiores que este limite não são lidos antecipadamente
+        self.limite_bytes_leitura = limite_bytes_leitura
+        self._executor_leitura = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        """
+        Encerra as threads de leitura antecipada
+        """
+        if self._executor_leitura is not None:
+            self._executor_leitura.shutdown(wait=False)
+            self._executor_leitura = None
+
+    def _ler_arquivo(self, caminho_arquivo):
+        """
+        Lê o arquivo inteiro (bloqueante; roda nas threads de leitura)
+        """
+        if os.path.getsize(caminho_arquivo) > self.limite_bytes_leitura:
+            return None
+        with open(caminho_arquivo, 'rb') as arquivo:
+            return arquivo.read()
+
+    async def _extrair(self, limite_leituras, caminho_arquivo):
+        loop = asyncio.get_running_loop()
+        try:
+            # A permissão só é liberada depois da extração consumir os bytes lidos, então
+            # no máximo max_leituras arquivos ficam na memória (max_leituras × limite_bytes_leitura)
+            async with limite_leituras:
+                dados = await loop.run_in_executor(self._executor_leitura, self._ler_arquivo, caminho_arquivo)
+                return await loop.run_in_executor(
+                    self.executor, self.extrator.extrair_metadados_arquivo, caminho_arquivo, None, dados
+                )
+        except Exception as e:
+            logger.error(f"Erro ao processar {caminho_arquivo}: {e}")
+            return {
+                "nome_arquivo": os.path.basename(caminho_arquivo),
+                "caminho_arquivo": caminho_arquivo,
+                "erro": str(e)
+            }
+
+    async def extrair_metadados(self, caminhos):
+        """
+        Extrai os metadados de cada caminho (iterável comum ou assíncrono).
+        Gera os resultados na ordem de entrada; se o consumidor atrasar, a leitura para.
+        """
+        if self._executor_leitura is None:
+            self._executor_leitura = ThreadPoolExecutor(
+                max_workers=self.max_leituras, thread_name_prefix="leitura_metadados"
+            )
+        limite_leituras = asyncio.Semaphore(self.max_leituras)
+        fila = asyncio.Queue(maxsize=self.max_pendentes)
+
+        async def enfileirar(caminho_arquivo):
+            tarefa = asyncio.ensure_future(self._extrair(limite_leituras, caminho_arquivo))
+            try:
+                await fila.put(tarefa)
+            except asyncio.CancelledError:
+                tarefa.cancel()
+                raise
+
+        async def produzir():
+            try:
+                if hasattr(caminhos, '__aiter__'):
+                    async for caminho_arquivo in caminhos:
+                        await enfileirar(caminho_arquivo)
+                else:
+                    for caminho_arquivo in caminhos:
+                        await enfileirar(caminho_arquivo)
+            except Exception as e:
+                await fila.put(e)
+                return
+            await fila.put(None)
+
+        produtor = asyncio.ensure_future(produzir())
+        tarefa = None
+        try:
+            while True:
+                tarefa = await fila.get()
+                if tarefa is None:
+                    break
+                if isinstance(tarefa, Exception):
+                    raise tarefa
+                yield await tarefa
+        finally:
+            # Consumidor encerrado antes do fim: cancelar o que ainda está pendente
+            produtor.cancel()
+            if isinstance(tarefa, asyncio.Future):
+                tarefa.cancel()
+            while not fila.empty():
+                pendente = fila.get_nowait()
+                if isinstance(pendente, asyncio.Future):
+                    pendente.cancel()
+
+    async def extrair_diretorio(self):
+        """
+        Extrai os metadados de todos os arquivos suportados do diretório base
+        """
+        loop = asyncio.get_running_loop()
+        arquivos_alvo = await loop.run_in_executor(None, self.extrator.listar_arquivos_suportados)
+        async for info_arquivo in self.extrair_metadados(item[0] for item in arquivos_alvo):
+            yield info_arquivo
+
 def main():
+    # Opções de linha de comando
+    parser = argparse.ArgumentParser(description="Extração avançada de metadados")
+    parser.add_argument(
+        "--log-nivel", dest="nivel_log", default="WARNING",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Nível de logging (DEBUG inclui o diagnóstico de cada imagem)"
+    )
+    parser.add_argument("--log-arquivo", dest="arquivo_log", help="Gravar logs neste arquivo em vez do terminal")
+    parser.add_argument(
+        "--progresso-jsonl", dest="arquivo_progresso",
+        help="Gravar o progresso em JSON Lines neste arquivo (para orquestração)"
+    )
+    parser.add_argument(
+        "--sem-progresso", dest="mostrar_progresso", action="store_false", default=None,
+        help="Não exibir a linha de progresso (por padrão ela só aparece quando a saída de erro é um terminal)"
+    )
+    parser.add_argument(
+        "--sem-hash", dest="calcular_hash", action="store_false",
+        help="Não calcular o SHA-256 de cada arquivo (evita uma segunda leitura; a comparação usa tamanho e data)"
+    )
+    parser.add_argument(
+        "--comparar", dest="relatorio_anterior", metavar="RELATORIO",
+        help="Comparar esta execução com um relatório anterior e gerar um relatório diferencial"
+    )
+    argumentos = parser.parse_args()
+
+    configurar_logging(getattr(logging, argumentos.nivel_log), argumentos.arquivo_log)
+
     # Caminho do diretório para análise
     diretorio_base = r"C:\Users\InFuture\Desktop\CyberInvestigations\METADADOS"
     
@@ -313,6 +1029,14 @@ def main():
         print("Crie o diretório ou verifique o caminho.")
         return
 
+    # Conferir o relatório anterior antes de uma extração que pode levar horas
+    if argumentos.relatorio_anterior:
+        try:
+            validar_relatorio(argumentos.relatorio_anterior)
+        except (ValueError, OSError) as e:
+            print(f"❌ Relatório anterior não pode ser comparado: {e}")
+            return
+
     # Testar instalação de bibliotecas
     testar_instalacao_bibliotecas()
 
@@ -320,7 +1044,12 @@ def main():
     print("="*50)
 
     # Criar extrator
-    extrator = MetadataExtractor(diretorio_base)
+    extrator = MetadataExtractor(
+        diretorio_base,
+        mostrar_progresso=argumentos.mostrar_progresso,
+        arquivo_progresso=argumentos.arquivo_progresso,
+        calcular_hash=argumentos.calcular_hash
+    )
     
     # Processar diretório
     resultados = extrator.processar_diretorio()
@@ -346,5 +1075,20 @@ def main():
     if len(resultados['arquivos_processados']) > 5:
         print(f"\n... e mais {len(resultados['arquivos_processados']) - 5} arquivos (veja o relatório JSON completo)")
 
+    # Relatório diferencial em relação a uma execução anterior
+    if argumentos.relatorio_anterior:
+        try:
+            resumo = extrator.gerar_relatorio_diferencial(argumentos.relatorio_anterior)
+        except (ValueError, OSError) as e:
+            print(f"❌ Falha ao gerar o relatório diferencial: {e}")
+            return
+        print("\n🔀 Diferenças em relação ao relatório anterior:")
+        print(f"Adicionados: {resumo['adicionado']}")
+        print(f"Removidos: {resumo['removido']}")
+        print(f"Modificados: {resumo['modificado']}")
+        print(f"Metadados alterados: {resumo['metadados_alterados']}")
+        print(f"Apenas data de modificação alterada: {resumo['data_modificacao_alterada']}")
+        print(f"Mesmo conteúdo, extração diferente: {resumo['extracao_alterada']}")
+
 if __name__ == "__main__":
     main()